@@ -14,10 +14,12 @@ from sklearn.ensemble import RandomForestClassifier  # For building a random for
 from sklearn.model_selection import train_test_split  # For splitting the dataset into training and testing sets
 from sklearn.preprocessing import LabelEncoder  # For encoding categorical variables
 import dash_bootstrap_components as dbc  # For using Bootstrap components in Dash
+import metrics  # Shared stage timers, counters and /metrics endpoint
 
 # Initialize Flask and Dash
 server = FlaskBase(__name__)  # Create a Flask server instance
 app = Dash(__name__, server=server, external_stylesheets=[dbc.themes.BOOTSTRAP])  # Create a Dash app with Bootstrap styling
+metrics.register_endpoints(server)  # Add request counters and the /metrics endpoint to the Flask server
 
 # Define column names for the dataset
 columns = ["duration","protocol_type","service","flag","src_bytes","dst_bytes","land",
@@ -71,7 +73,8 @@ y = df["label"]  # Extract the 'label' column as the target variable
 
 X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)  # Split the dataset into training and testing sets
 model = RandomForestClassifier(n_jobs=-1, n_estimators=100)  # Initialize a random forest classifier
-model.fit(X_train, y_train)  # Train the model on the training data
+with metrics.stage_timer('model_fit'):  # Time the model training
+    model.fit(X_train, y_train)  # Train the model on the training data
 
 # Detection variables
 detecting = False  # Boolean flag to indicate whether detection is active
@@ -81,6 +84,11 @@ alert_messages = []  # List to store alert messages
 packet_data = []  # List to store packet data for visualization
 data_lock = threading.Lock()  # Thread lock to ensure thread-safe access to shared data
 
+# Queue depth gauges
+metrics.register_gauge('queue_depth', lambda: len(alert_messages), {'queue': 'alert_messages'}, 'Number of items held in each queue.')  # Alert messages kept in memory
+metrics.register_gauge('queue_depth', lambda: len(packet_data), {'queue': 'packet_data'}, 'Number of items held in each queue.')  # Graph points kept in memory
+metrics.register_gauge('detecting', lambda: int(detecting), help_text='Whether packet detection is running.')  # Detection state
+
 # UI Layout
 app.layout = html.Div([  # Define the layout of the Dash application
     html.H1("Intrusion Detection System", style={'textAlign': 'center'}),  # Title of the application
@@ -104,7 +112,9 @@ def simulate_packets():  # Function to simulate packet detection
         with data_lock:  # Acquire the thread lock to ensure thread-safe access
             packet_row = X.sample(1)  # Randomly sample a row from the feature matrix
             packet = packet_row.values[0]  # Extract the packet data as a NumPy array
-            prediction = model.predict(packet_row)[0]  # Predict the label for the packet
+            with metrics.stage_timer('model_predict'):  # Time the model prediction
+                prediction = model.predict(packet_row)[0]  # Predict the label for the packet
+            metrics.inc('predictions_total', {'result': 'good' if prediction == normal_label else 'bad'}, help_text='Packets classified, by result.')  # Count the prediction
             ip_src = f"192.168.0.{np.random.randint(1, 255)}"  # Generate a random source IP address
             ip_dst = f"10.0.0.{np.random.randint(1, 255)}"  # Generate a random destination IP address
 
@@ -137,6 +147,7 @@ def simulate_packets():  # Function to simulate packet detection
     Input("start-button", "n_clicks"),  # Listen for clicks on the start button
     Input("stop-button", "n_clicks")  # Listen for clicks on the stop button
 )
+@metrics.timed('callback_toggle_detection')  # Time the callback
 def toggle_detection(start_clicks, stop_clicks):  # Function to toggle detection
     global detecting  # Use the global 'detecting' flag
     if ctx.triggered_id == "start-button":  # If the start button was clicked
@@ -153,6 +164,7 @@ def toggle_detection(start_clicks, stop_clicks):  # Function to toggle detection
     Output("packet-counts", "children"),  # Update the packet count display
     Input("interval-component", "n_intervals")  # Listen for updates from the interval component
 )
+@metrics.timed('callback_update_counts')  # Time the callback
 def update_counts(n):  # Function to update packet counts
     with data_lock:  # Acquire the thread lock to ensure thread-safe access
         return f"Good Packets: {len(good_packets)} | Bad Packets: {len(bad_packets)}"  # Return the updated packet counts
@@ -162,6 +174,7 @@ def update_counts(n):  # Function to update packet counts
     Output("alerts", "children"),  # Update the alerts display
     Input("interval-component", "n_intervals")  # Listen for updates from the interval component
 )
+@metrics.timed('callback_update_alerts')  # Time the callback
 def update_alerts(n):  # Function to update alerts
     with data_lock:  # Acquire the thread lock to ensure thread-safe access
         return alert_messages[-10:]  # Return the last 10 alert messages
@@ -171,6 +184,7 @@ def update_alerts(n):  # Function to update alerts
     Output("live-graph", "figure"),  # Update the live graph
     Input("interval-component", "n_intervals")  # Listen for updates from the interval component
 )
+@metrics.timed('callback_update_graph')  # Time the callback
 def update_graph(n):  # Function to update the live graph
     with data_lock:  # Acquire the thread lock to ensure thread-safe access
         if not packet_data:  # If no packet data is available
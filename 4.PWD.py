@@ -1,12 +1,30 @@
 # Importing necessary libraries
+import os  # Library to build file paths and read the number of available CPUs.
 import re  # Regular expression library for string matching and manipulation.
+import sys  # Library to access standard input, output and error streams.
+import io  # Library to decode byte streams as text.
+import gzip  # Library to read gzip-compressed log files.
+import json  # Library to write scan results as JSON lines.
+import time  # Library to measure the duration of a log scan.
+import argparse  # Library to parse command-line options.
+import unicodedata  # Library to normalize Unicode text.
 import webbrowser  # Library to open URLs in a web browser.
 import threading  # Library to handle concurrent execution of threads.
+from collections import OrderedDict  # Ordered dictionary used as a bounded (LRU) seen-set.
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED  # Process pool to scan domains in parallel.
 import tldextract  # Library to extract domain, subdomain, and suffix from URLs.
 from flask import Flask, render_template_string, request, redirect, url_for  # Flask framework for creating a web application.
 import Levenshtein  # Library to calculate the Levenshtein distance between strings.
+import metrics  # Shared stage timers, counters and /metrics endpoint.
+try:
+    import resource  # Library to read the memory high-water mark on Linux and macOS.
+except ImportError:
+    resource = None
+    import ctypes  # Library to read the memory high-water mark from the Windows API instead.
+    from ctypes import wintypes
 
 app = Flask(__name__)  # Creating a Flask application instance.
+metrics.register_endpoints(app)  # Adds request counters and the /metrics endpoint to the app.
 
 # Trusted domains list
 trusted_domains = [
@@ -14,6 +32,53 @@ trusted_domains = [
     'twitter.com', 'instagram.com', 'linkedin.com', 'netflix.com', 'microsoft.com',
     'apple.com', 'adobe.com', 'paypal.com', 'dropbox.com', 'whatsapp.com'
 ]  # A list of trusted domains to compare against user input.
+trusted_set = {t.lower() for t in trusted_domains}  # Set of trusted domains for O(1) membership checks.
+
+# Load the Unicode confusables data (UTS #39 confusables.txt, bundled next to this script)
+def load_confusables(path):
+    table = {}  # Maps each confusable character to the prototype string it imitates.
+    with open(path, 'r', encoding='utf-8-sig') as f:  # Opens the data file, skipping the byte order mark.
+        for line in f:  # Reads one mapping per line: "source ; prototype ; type # comment".
+            fields = line.split('#', 1)[0].split(';')  # Drops the comment and splits the fields.
+            if len(fields) < 2:  # Skips blank and comment-only lines.
+                continue
+            source = chr(int(fields[0], 16))  # Decodes the single source code point.
+            table[source] = ''.join(chr(int(cp, 16)) for cp in fields[1].split())  # Decodes the prototype code points.
+    return table  # Returns the confusables table.
+
+confusables = load_confusables(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'confusables.txt'))  # Confusables table used to build skeletons.
+
+# Decode punycode (IDN) labels of a domain to Unicode
+def decode_idn(domain):
+    labels = []  # List to collect the decoded labels of the domain.
+    for label in domain.split('.'):  # Iterates over each dot-separated label.
+        if label.startswith('xn--'):  # Checks if the label is punycode (IDN).
+            try:
+                label = label[4:].encode('ascii').decode('punycode')  # Decodes the punycode label to Unicode.
+            except (UnicodeError, ValueError):  # Leaves malformed punycode untouched.
+                pass
+        labels.append(label)  # Adds the decoded label to the list.
+    return '.'.join(labels)  # Returns the Unicode form of the domain.
+
+# Convert text to its confusable skeleton (UTS #39: NFD, map to prototypes, NFD)
+def get_skeleton(text):
+    text = unicodedata.normalize('NFD', text)  # Decomposes the text as required by UTS #39.
+    return unicodedata.normalize('NFD', ''.join(confusables.get(c, c) for c in text))  # Replaces every confusable character with its prototype.
+
+# Precomputed skeleton index of the trusted domains
+skeleton_index = {}  # Maps each trusted skeleton to its domain for O(1) lookups.
+for trusted in trusted_domains:
+    skeleton_index.setdefault(get_skeleton(trusted.lower()), trusted.lower())  # Lowercase skeleton.
+    skeleton_index.setdefault(get_skeleton(trusted.upper()), trusted.lower())  # Uppercase skeleton, since domain names ignore case.
+
+# Check for homoglyph / IDN look-alikes of an already extracted domain
+def find_homoglyph_target(domain):
+    with metrics.stage_timer('homoglyph_lookup'):  # Times the skeleton index lookup.
+        decoded = decode_idn(domain)  # Converts punycode labels to Unicode.
+        target = skeleton_index.get(get_skeleton(decoded)) or skeleton_index.get(get_skeleton(decoded.upper()))  # Looks up the trusted domain sharing the same skeleton in either case.
+    if target and target != domain:  # A different domain that renders like a trusted one is a homoglyph.
+        return target  # Returns the imitated trusted domain.
+    return None  # Returns None if the domain is not a homoglyph of a trusted domain.
 
 # HTML Template
 template = """
@@ -108,23 +173,43 @@ template = """
 </html>
 """  # HTML template for rendering the phishing detector UI with dynamic content.
 
-# Check domain spelling
-def is_domain_misspelled(url):
+# Parse a URL once into its parts
+def parse_url(url):
     extracted = tldextract.extract(url)  # Extracts subdomain, domain, and suffix from the URL.
     domain = f"{extracted.domain}.{extracted.suffix}".lower()  # Combines domain and suffix into a lowercase string.
-    return domain not in [t.lower() for t in trusted_domains]  # Checks if the domain is not in the trusted domains list.
+    return extracted, domain  # Returns the extracted parts and the registered domain.
+
+# Check domain spelling
+def is_domain_misspelled(url):
+    extracted, domain = parse_url(url)  # Parses the URL.
+    return domain not in trusted_set  # Checks if the domain is not in the trusted domains list.
 
 # Dynamically calculate confidence
 def calculate_confidence(url):
-    extracted = tldextract.extract(url)  # Extracts subdomain, domain, and suffix from the URL.
-    full_domain = f"{extracted.domain}.{extracted.suffix}".lower()  # Combines domain and suffix into a lowercase string.
-    distances = [Levenshtein.distance(full_domain, trusted) for trusted in trusted_domains]  # Calculates Levenshtein distance between the input domain and each trusted domain.
+    extracted, domain = parse_url(url)  # Parses the URL.
+    return score_domain(extracted, domain, find_homoglyph_target(domain))  # Scores the parsed domain.
+
+# Score an already parsed domain
+def score_domain(extracted, full_domain, homoglyph_target):
+    with metrics.stage_timer('distance_scan'):  # Times the Levenshtein distance scan.
+        distances = [Levenshtein.distance(full_domain, trusted) for trusted in trusted_domains]  # Calculates Levenshtein distance between the input domain and each trusted domain.
     min_distance = min(distances)  # Finds the smallest distance (most similar trusted domain).
+    if homoglyph_target:  # Checks if the domain is a homoglyph of a trusted domain.
+        min_distance = 0  # Treats a visually identical domain as an exact imitation.
     subdomain_penalty = len(extracted.subdomain.split('.')) * 5 if extracted.subdomain else 0  # Adds penalty for long subdomains.
     total_penalty = min_distance * 10 + subdomain_penalty  # Calculates total penalty based on distance and subdomain length.
     confidence = max(20, 100 - total_penalty)  # Calculates confidence score, ensuring it doesn't drop below 20%.
     return confidence  # Returns the calculated confidence score.
 
+# Run every check on a URL with a single parse and skeleton lookup
+def check_url(url):
+    with metrics.stage_timer('url_parse'):  # Times the parse of the checked URL only (not the accuracy test URLs).
+        extracted, domain = parse_url(url)  # Parses the URL once.
+    homoglyph_target = find_homoglyph_target(domain)  # Looks up the skeleton once.
+    phishing = domain not in trusted_set  # Checks if the domain is not in the trusted domains list.
+    confidence = score_domain(extracted, domain, homoglyph_target)  # Calculates the confidence score.
+    return phishing, confidence, homoglyph_target  # Returns all results for the URL.
+
 # Dynamic star rating
 def get_star_rating(confidence, is_phishing):
     if is_phishing:
@@ -178,10 +263,11 @@ def index():
             return redirect(url_for('index'))  # Redirects to the homepage to clear the form.
 
         url = request.form['url']  # Retrieves the URL entered by the user.
-        phishing = is_domain_misspelled(url)  # Checks if the domain is misspelled or untrusted.
-        confidence = calculate_confidence(url)  # Calculates the confidence score for the URL.
+        phishing, confidence, _ = check_url(url)  # Checks if the domain is untrusted and calculates the confidence score.
         stars = get_star_rating(confidence, phishing)  # Gets the star rating based on the confidence score and phishing status.
-        accuracy = compute_accuracy()  # Computes the accuracy of the model using test data.
+        with metrics.stage_timer('compute_accuracy'):  # Times the accuracy computation.
+            accuracy = compute_accuracy()  # Computes the accuracy of the model using test data.
+        metrics.inc('predictions_total', {'result': 'phishing' if phishing else 'legit'}, help_text='URLs checked, by result.')  # Counts the prediction.
 
         if phishing:
             result = "⚠️ Phishing Website."  # Displays a warning message for phishing websites.
@@ -190,22 +276,165 @@ def index():
             result = "✅ Legitimate Website."  # Displays a success message for legitimate websites.
             result_class = 'legit'  # Applies the "legit" CSS class for styling.
 
-        return render_template_string(
-            template,
-            url=url,  # Passes the entered URL to the template.
-            result=result,  # Passes the result message to the template.
-            result_class=result_class,  # Passes the CSS class for styling the result.
-            confidence=confidence,  # Passes the confidence score to the template.
-            accuracy=accuracy,  # Passes the model accuracy to the template.
-            stars=stars  # Passes the star rating to the template.
-        )  # Renders the HTML template with dynamic content.
+        with metrics.stage_timer('template_render'):  # Times the template rendering.
+            return render_template_string(
+                template,
+                url=url,  # Passes the entered URL to the template.
+                result=result,  # Passes the result message to the template.
+                result_class=result_class,  # Passes the CSS class for styling the result.
+                confidence=confidence,  # Passes the confidence score to the template.
+                accuracy=accuracy,  # Passes the model accuracy to the template.
+                stars=stars  # Passes the star rating to the template.
+            )  # Renders the HTML template with dynamic content.
+
+    with metrics.stage_timer('template_render'):  # Times the template rendering.
+        return render_template_string(template)  # Renders the HTML template for GET requests.
+
+# Streaming log scanner
+url_pattern = re.compile(r"\b(?:https?|ftp)://(?:[^\s/@\"'<>]+@)?((?:[^\W_]|[-.])+)", re.IGNORECASE)  # Precompiled regex capturing the host (Unicode letters, digits, "-" and ".") of every URL in a line.
+
+# Bounded set of already scanned hosts
+class SeenSet:
+    def __init__(self, max_size):
+        self.max_size = max_size  # Maximum number of hosts remembered at once.
+        self.items = OrderedDict()  # Hosts in least-recently-seen order.
+
+    def add(self, key):
+        if key in self.items:  # Checks if the host was already seen.
+            self.items.move_to_end(key)  # Marks the host as recently seen.
+            return False  # Returns False for a repeated host.
+        self.items[key] = None  # Remembers the new host.
+        if len(self.items) > self.max_size:  # Checks if the set is over its size limit.
+            self.items.popitem(last=False)  # Forgets the least recently seen host.
+        return True  # Returns True for a new host.
+
+# Read the lines of a plain or gzip-compressed log lazily
+def read_log(path):
+    raw = sys.stdin.buffer if path == '-' else open(path, 'rb')  # Reads bytes from standard input when the path is "-".
+    try:
+        is_gzip = raw.peek(2)[:2] == b'\x1f\x8b'  # Checks for the gzip magic number without consuming it (works on pipes too).
+        stream = gzip.GzipFile(fileobj=raw) if is_gzip else raw  # Decompresses gzip data on the fly.
+        yield from io.TextIOWrapper(stream, encoding='utf-8', errors='replace')  # Decodes line by line, replacing invalid bytes.
+    finally:
+        raw.close()  # Closes the log file.
+
+# Scan a batch of hosts (runs inside a worker process)
+def scan_batch(batch):
+    results = []  # List to collect the result for each host.
+    for host, source in batch:  # Iterates over each host and where it was first seen.
+        url = f"http://{host}"  # Builds a URL so the host can be checked like form input.
+        phishing, confidence, homoglyph_target = check_url(url)  # Runs every check on the host at once.
+        results.append({
+            'host': host,  # The scanned host name.
+            'source': source,  # The file and line where the host was first seen.
+            'phishing': phishing,  # Whether the domain is flagged as phishing.
+            'confidence': confidence,  # The confidence score for the domain.
+            'homoglyph_of': homoglyph_target,  # The trusted domain it imitates, if any.
+            'stars': get_star_rating(confidence, phishing)  # The star rating for the domain.
+        })
+    return results, get_peak_memory_mb()  # Returns the results for the whole batch and the worker's peak memory.
 
-    return render_template_string(template)  # Renders the HTML template for GET requests.
+# Read the memory high-water mark of the current process in MB
+def get_peak_memory_mb():
+    if resource is not None:  # Linux and macOS.
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # Peak resident set size (KB on Linux, bytes on macOS).
+        return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)  # Converts the peak to MB.
+    if sys.platform == 'win32':  # Windows: read the peak working set with GetProcessMemoryInfo.
+        class ProcessMemoryCounters(ctypes.Structure):
+            _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD)] + [
+                (name, ctypes.c_size_t) for name in ('PeakWorkingSetSize', 'WorkingSetSize', 'QuotaPeakPagedPoolUsage',
+                                                     'QuotaPagedPoolUsage', 'QuotaPeakNonPagedPoolUsage',
+                                                     'QuotaNonPagedPoolUsage', 'PagefileUsage', 'PeakPagefileUsage')]
+        counters = ProcessMemoryCounters()  # Structure filled in by the Windows API.
+        counters.cb = ctypes.sizeof(counters)
+        kernel32, psapi = ctypes.WinDLL('kernel32'), ctypes.WinDLL('psapi')
+        kernel32.GetCurrentProcess.restype = wintypes.HANDLE  # Returns a pseudo handle to this process.
+        psapi.GetProcessMemoryInfo.argtypes = [wintypes.HANDLE, ctypes.POINTER(ProcessMemoryCounters), wintypes.DWORD]
+        if psapi.GetProcessMemoryInfo(kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb):
+            return round(counters.PeakWorkingSetSize / (1024 * 1024), 1)  # Converts the peak to MB.
+    return None  # The peak is not available on this platform.
+
+# Stream logs through the phishing checks
+def scan_logs(paths, output, workers=None, min_confidence=70, seen_limit=100000, batch_size=256):
+    seen = SeenSet(seen_limit)  # Bounded set of hosts that were already scanned.
+    stats = {'lines': 0, 'urls': 0, 'seen_hits': 0, 'scanned': 0, 'flagged': 0, 'worker_peak': None}  # Counters reported at the end of the run.
+    if output == '-':
+        sys.stdout.reconfigure(encoding='utf-8')  # Writes Unicode hosts as UTF-8 whatever the console encoding is.
+    out = sys.stdout if output == '-' else open(output, 'w', encoding='utf-8')  # Destination for flagged results.
+    start = time.perf_counter()  # Records the start time of the scan.
+
+    def write_results(done):
+        for future in done:  # Iterates over each finished batch.
+            results, worker_peak = future.result()  # Reads the batch results and the worker's peak memory.
+            if worker_peak is not None:
+                stats['worker_peak'] = max(stats['worker_peak'] or 0, worker_peak)  # Keeps the largest worker peak.
+            for result in results:  # Iterates over each host result in the batch.
+                stats['scanned'] += 1  # Counts the scanned host.
+                if result['phishing'] and result['confidence'] >= min_confidence:  # Checks if the host looks like a trusted domain.
+                    stats['flagged'] += 1  # Counts the flagged host.
+                    out.write(json.dumps(result, ensure_ascii=False) + '\n')  # Writes the result as one JSON line.
+
+    metrics.disable()  # Stage timers are only exported by the web app, so they are skipped while scanning.
+    with ProcessPoolExecutor(max_workers=workers, initializer=metrics.disable) as pool:  # Starts the pool of worker processes without metrics.
+        max_pending = (workers or os.cpu_count() or 1) * 2  # Limits the batches in flight to keep memory bounded.
+        pending = set()  # Batches submitted but not yet written.
+        batch = []  # Hosts waiting to be submitted.
+        for path in paths:  # Iterates over each log file.
+            for line_no, line in enumerate(read_log(path), 1):  # Reads the log one line at a time.
+                stats['lines'] += 1  # Counts the line.
+                for match in url_pattern.finditer(line):  # Finds every URL in the line.
+                    stats['urls'] += 1  # Counts the URL.
+                    host = match.group(1).lower().rstrip('.')  # Normalizes the host name.
+                    if not seen.add(host):  # Skips hosts that were already scanned.
+                        stats['seen_hits'] += 1  # Counts the repeated host.
+                        continue
+                    batch.append((host, f"{path}:{line_no}"))  # Queues the new host for scanning.
+                    if len(batch) >= batch_size:  # Checks if the batch is full.
+                        if len(pending) >= max_pending:  # Waits for a worker if too many batches are in flight.
+                            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                            write_results(done)  # Writes the finished batches.
+                        pending.add(pool.submit(scan_batch, batch))  # Sends the batch to a worker.
+                        batch = []  # Starts a new batch.
+        if batch:
+            pending.add(pool.submit(scan_batch, batch))  # Sends the last partial batch.
+        write_results(wait(pending).done)  # Writes the remaining batches.
+
+    if out is not sys.stdout:
+        out.close()  # Closes the output file.
+
+    elapsed = time.perf_counter() - start  # Calculates the total scan time.
+    report = {
+        'lines': stats['lines'],  # Total lines read.
+        'urls': stats['urls'],  # Total URLs found.
+        'scanned': stats['scanned'],  # Unique hosts checked by the workers.
+        'flagged': stats['flagged'],  # Hosts written to the output.
+        'seconds': round(elapsed, 2),  # Duration of the scan.
+        'lines_per_sec': round(stats['lines'] / elapsed) if elapsed else 0,  # Throughput of the scan.
+        'seen_hit_rate': round(stats['seen_hits'] / stats['urls'], 4) if stats['urls'] else 0,  # Share of URLs skipped as repeats.
+        'flag_rate': round(stats['flagged'] / stats['scanned'], 4) if stats['scanned'] else 0,  # Share of scanned hosts flagged.
+        'peak_memory_mb': get_peak_memory_mb(),  # Memory high-water mark of the reader.
+        'peak_worker_memory_mb': stats['worker_peak']  # Memory high-water mark of the largest worker.
+    }
+    if report['peak_memory_mb'] is None:  # Explains a missing memory figure instead of printing null silently.
+        print('note: peak memory is not available on this platform', file=sys.stderr)
+    print(json.dumps(report), file=sys.stderr)  # Prints the run summary to standard error.
+    return report  # Returns the run summary.
 
 # Open in browser
 def open_browser():
     webbrowser.open_new('http://127.0.0.1:5000/')  # Opens the Flask app in the default web browser.
 
 if __name__ == '__main__':
-    threading.Timer(1.0, open_browser).start()  # Starts a timer to open the browser after 1 second.
-    app.run(debug=False)  # Runs the Flask app in production mode (debugging disabled).
+    parser = argparse.ArgumentParser(description='Phishing Website Detector')  # Parses the command-line options.
+    parser.add_argument('--scan', nargs='+', metavar='LOG', help='scan plain or gzip log files (use - for stdin) instead of starting the web app')
+    parser.add_argument('--output', default='-', help='file to write flagged results as JSON lines (default: stdout)')
+    parser.add_argument('--workers', type=int, default=None, help='number of worker processes (default: CPU count)')
+    parser.add_argument('--min-confidence', type=int, default=70, help='lowest confidence score written to the output')
+    parser.add_argument('--seen-limit', type=int, default=100000, help='maximum number of hosts remembered for de-duplication')
+    args = parser.parse_args()
+
+    if args.scan:  # Runs the streaming log scanner.
+        scan_logs(args.scan, args.output, args.workers, args.min_confidence, args.seen_limit)
+    else:  # Runs the web app.
+        threading.Timer(1.0, open_browser).start()  # Starts a timer to open the browser after 1 second.
+        app.run(debug=False)  # Runs the Flask app in production mode (debugging disabled).
@@ -0,0 +1,233 @@
+# Importing necessary libraries
+import os  # Library to read environment variables.
+import math  # Library to check that the profiler interval is a finite number.
+import sys  # Library to read the current stack frame of every thread.
+import time  # Library to measure elapsed time.
+import bisect  # Library to find the histogram bucket for a value.
+import threading  # Library to lock shared state and run the profiler thread.
+import functools  # Library to wrap functions with a timer.
+from collections import Counter  # Counter used to aggregate profiler stack samples.
+from contextlib import contextmanager, nullcontext  # Helpers to build the stage timer context manager.
+from flask import Response, request, g  # Flask objects used by the metrics endpoints.
+
+# Shared metric state
+buckets = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)  # Histogram bucket upper bounds in seconds.
+counters = {}  # Maps (name, labels) to the counter value.
+gauges = {}  # Maps (name, labels) to a function returning the current gauge value.
+histograms = {}  # Maps (name, labels) to [bucket counts, sum, count].
+help_texts = {}  # Maps each metric name to its (type, help text).
+metrics_lock = threading.Lock()  # Thread lock to ensure thread-safe updates.
+enabled = True  # Whether timings and counters are recorded.
+
+# Stop recording metrics (e.g. in batch jobs where nothing is scraped)
+def disable():
+    global enabled
+    enabled = False
+
+# Convert a labels dictionary to a hashable key
+def label_key(labels):
+    return tuple(sorted(labels.items())) if labels else ()  # Sorts the labels so the same set always gives the same key.
+
+# Increase a counter
+def inc(name, labels=None, value=1, help_text=''):
+    if not enabled:
+        return
+    key = (name, label_key(labels))  # Builds the key of the counter.
+    with metrics_lock:  # Acquires the lock to update the counter safely.
+        help_texts.setdefault(name, ('counter', help_text))  # Records the metric type and help text.
+        counters[key] = counters.get(key, 0) + value  # Adds the value to the counter.
+
+# Register a gauge whose value is read when metrics are scraped (e.g. a queue depth)
+def register_gauge(name, callback, labels=None, help_text=''):
+    with metrics_lock:  # Acquires the lock to register the gauge safely.
+        help_texts.setdefault(name, ('gauge', help_text))  # Records the metric type and help text.
+        gauges[(name, label_key(labels))] = callback  # Stores the function that returns the gauge value.
+
+# Record one observation in a histogram
+def observe(name, value, labels=None, help_text=''):
+    if not enabled:
+        return
+    key = (name, label_key(labels))  # Builds the key of the histogram.
+    index = bisect.bisect_left(buckets, value)  # Finds the first bucket the value fits in.
+    with metrics_lock:  # Acquires the lock to update the histogram safely.
+        if key not in histograms:  # Creates the histogram on first use.
+            help_texts.setdefault(name, ('histogram', help_text))
+            histograms[key] = [[0] * (len(buckets) + 1), 0.0, 0]  # One count per bucket plus +Inf, sum and count.
+        entry = histograms[key]
+        entry[0][index] += 1  # Counts the value in its bucket.
+        entry[1] += value  # Adds the value to the sum.
+        entry[2] += 1  # Counts the observation.
+
+# Time a block of code as a named stage
+def stage_timer(stage):
+    if not enabled:
+        return nullcontext()  # Skips the clock and the lock when metrics are disabled.
+    return record_stage(stage)
+
+@contextmanager
+def record_stage(stage):
+    start = time.perf_counter()  # Records the start time of the stage.
+    try:
+        yield
+    finally:
+        observe('stage_duration_seconds', time.perf_counter() - start, {'stage': stage},
+                'Time spent in each processing stage.')  # Records the stage duration in the histogram.
+
+# Time every call of a function as a named stage
+def timed(stage):
+    def decorator(func):
+        @functools.wraps(func)  # Keeps the name and docstring of the wrapped function.
+        def wrapper(*args, **kwargs):
+            with stage_timer(stage):  # Times the function call.
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+# Format labels in Prometheus text format
+def format_labels(key, extra=None):
+    pairs = list(key) + ([extra] if extra else [])  # Adds the extra label (e.g. "le") if given.
+    if not pairs:
+        return ''  # Metrics without labels have no braces.
+    escaped = [(k, str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')) for k, v in pairs]  # Escapes label values.
+    return '{' + ','.join(f'{k}="{v}"' for k, v in escaped) + '}'
+
+# Render every metric in Prometheus text format
+def render():
+    lines = []  # List to collect the output lines.
+    with metrics_lock:  # Acquires the lock to read a consistent snapshot.
+        counter_items = sorted(counters.items())  # Snapshot of the counters.
+        gauge_items = sorted(gauges.items(), key=lambda item: item[0])  # Snapshot of the gauges.
+        histogram_items = sorted((key, [list(e[0]), e[1], e[2]]) for key, e in histograms.items())  # Snapshot of the histograms.
+        types = dict(help_texts)  # Snapshot of the help texts.
+    written = set()  # Metric names whose HELP and TYPE lines were already written.
+
+    def header(name):
+        if name not in written:  # Writes the HELP and TYPE lines once per metric.
+            kind, text = types.get(name, ('untyped', ''))
+            lines.append(f'# HELP {name} {text}')
+            lines.append(f'# TYPE {name} {kind}')
+            written.add(name)
+
+    for (name, key), value in counter_items:  # Writes every counter.
+        header(name)
+        lines.append(f'{name}{format_labels(key)} {value}')
+    for (name, key), callback in gauge_items:  # Writes every gauge.
+        try:
+            value = callback()  # Reads the current gauge value.
+        except Exception:  # Skips gauges that fail to read.
+            continue
+        header(name)
+        lines.append(f'{name}{format_labels(key)} {value}')
+    for (name, key), (counts, total, count) in histogram_items:  # Writes every histogram.
+        header(name)
+        cumulative = 0  # Prometheus buckets are cumulative.
+        for bound, bucket_count in zip(list(buckets) + ['+Inf'], counts):
+            cumulative += bucket_count
+            lines.append(f'{name}_bucket{format_labels(key, ("le", bound))} {cumulative}')
+        lines.append(f'{name}_sum{format_labels(key)} {total}')
+        lines.append(f'{name}_count{format_labels(key)} {count}')
+    return '\n'.join(lines) + '\n'  # Returns the full metrics page.
+
+# Sampling profiler
+profiler_samples = Counter()  # Maps each collapsed stack to the number of times it was sampled.
+profiler_thread = None  # The running profiler thread, or None when the profiler is off.
+profiler_interval = None  # Sampling interval of the running profiler in seconds.
+max_profiler_stacks = 5000  # Most distinct stacks kept; later new stacks are counted under "(other)".
+min_profiler_interval = 0.001  # Shortest allowed sampling interval (1 ms).
+profiler_stop = threading.Event()  # Event used to stop the profiler thread.
+profiler_control_lock = threading.RLock()  # Lock so concurrent requests cannot start two profiler threads.
+
+def profiler_loop(interval):
+    own_id = threading.get_ident()  # The profiler does not sample itself.
+    while not profiler_stop.wait(interval):  # Samples until the profiler is stopped.
+        for thread_id, frame in sys._current_frames().items():  # Reads the current frame of every thread.
+            if thread_id == own_id:
+                continue
+            stack = []  # List to collect the function names from the innermost frame outwards.
+            while frame is not None:
+                stack.append(f'{frame.f_code.co_name} ({os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno})')
+                frame = frame.f_back
+            key = ';'.join(reversed(stack))  # Collapsed (flame graph) format, outermost frame first.
+            with metrics_lock:  # Acquires the lock to update the samples safely.
+                if key not in profiler_samples and len(profiler_samples) >= max_profiler_stacks:
+                    key = '(other)'  # Keeps memory bounded in a long-running process.
+                profiler_samples[key] += 1  # Counts the sample.
+
+# Start the sampling profiler
+def start_profiler(interval=0.01):
+    global profiler_thread, profiler_interval
+    interval = max(interval, min_profiler_interval)  # Clamps the interval so sampling never runs in a tight loop.
+    with profiler_control_lock:
+        if profiler_thread is not None and interval != profiler_interval:  # Restarts a running profiler with the new interval.
+            stop_profiler()
+        if profiler_thread is None:  # Starts the profiler only if it is not already running.
+            profiler_stop.clear()
+            profiler_interval = interval
+            profiler_thread = threading.Thread(target=profiler_loop, args=(interval,), daemon=True)
+            profiler_thread.start()
+
+# Stop the sampling profiler
+def stop_profiler():
+    global profiler_thread, profiler_interval
+    with profiler_control_lock:
+        if profiler_thread is not None:  # Stops the profiler only if it is running.
+            profiler_stop.set()
+            profiler_thread.join()
+            profiler_thread = None
+            profiler_interval = None
+
+# Add request counters, in-flight gauge and the /metrics endpoints to a Flask server
+def register_endpoints(server):
+    in_flight = [0]  # Number of requests currently being handled.
+    register_gauge('http_requests_in_flight', lambda: in_flight[0], help_text='Requests currently being handled.')
+    register_gauge('profiler_enabled', lambda: int(profiler_thread is not None), help_text='Whether the sampling profiler is running.')
+
+    @server.before_request
+    def start_request():
+        with metrics_lock:
+            in_flight[0] += 1  # Counts the request as in flight.
+        g.metrics_start = time.perf_counter()  # Records the start time of the request.
+
+    @server.after_request
+    def count_request(response):
+        inc('http_requests_total', {'method': request.method, 'endpoint': request.endpoint or 'unknown',
+                                    'status': response.status_code}, help_text='HTTP requests handled.')
+        return response
+
+    @server.teardown_request
+    def finish_request(exc):
+        if 'metrics_start' in g:  # Only requests counted by start_request are finished here.
+            with metrics_lock:
+                in_flight[0] -= 1  # The request is no longer in flight.
+            observe('http_request_duration_seconds', time.perf_counter() - g.metrics_start,
+                    {'endpoint': request.endpoint or 'unknown'}, 'Total time spent handling each request.')
+
+    @server.route('/metrics')
+    def metrics_page():
+        return Response(render(), mimetype='text/plain; version=0.0.4')  # Serves the metrics in Prometheus text format.
+
+    @server.route('/metrics/profile', methods=['GET', 'POST'])
+    def profile_page():
+        if request.method == 'POST':  # Only POST requests may change the profiler state.
+            enable = request.values.get('enable')  # Reads the requested profiler state, if any.
+            if enable in ('1', 'true', 'on'):
+                try:
+                    interval = float(request.values.get('interval', 0.01))  # Reads the sampling interval in seconds.
+                except ValueError:
+                    interval = math.nan
+                if not math.isfinite(interval):  # Rejects values that are not numbers.
+                    return Response('interval must be a number of seconds\n', status=400, mimetype='text/plain')
+                start_profiler(interval)  # Turns the profiler on (the interval is clamped to at least 1 ms).
+            elif enable in ('0', 'false', 'off'):
+                stop_profiler()  # Turns the profiler off.
+            if request.values.get('reset') in ('1', 'true', 'on'):
+                with metrics_lock:
+                    profiler_samples.clear()  # Discards the collected samples.
+        elif 'enable' in request.args or 'reset' in request.args:  # GET is read-only.
+            return Response('use POST to change the profiler\n', status=405, headers={'Allow': 'POST'}, mimetype='text/plain')
+        with metrics_lock:
+            body = '\n'.join(f'{stack} {count}' for stack, count in profiler_samples.most_common())  # Collapsed stacks, most sampled first.
+        return Response(body + '\n', mimetype='text/plain')
+
+    if os.environ.get('METRICS_PROFILER') == '1':  # Starts the profiler at launch when requested.
+        start_profiler()